@@ -464,9 +464,11 @@ class Helioprojective(SunPyBaseCoordinateFrame):
             now with a third coordinate.
         """
         # Skip if we already are 3D
-        distance = self.spherical.distance
-        if not (distance.unit is u.one and u.allclose(distance, 1*u.one)):
-            return self
+        # (A unit-spherical representation is always 2D, so its unit distances are not checked)
+        if not isinstance(self.data, UnitSphericalRepresentation):
+            distance = self.spherical.distance
+            if not (distance.unit is u.one and u.allclose(distance, 1*u.one)):
+                return self
 
         if not isinstance(self.observer, BaseCoordinateFrame):
             raise ConvertError("Cannot calculate distance to the Sun "
@@ -32,7 +32,15 @@ from sunpy.coordinates import (
 )
 from sunpy.coordinates.ephemeris import get_body_heliographic_stonyhurst, get_earth
 from sunpy.coordinates.frames import _J2000
-from sunpy.coordinates.transformations import transform_with_sun_center
+from sunpy.coordinates.transformations import (
+    _SOLAR_NORTH_POLE_HCRS,
+    _SUN_DETILT_MATRIX,
+    _matrix_hcrs_to_hgs,
+    _rotation_matrix_obliquity,
+    _rotation_matrix_reprs_to_reprs,
+    _times_are_equal,
+    transform_with_sun_center,
+)
 from sunpy.sun.constants import radius as _RSUN
 from sunpy.sun.constants import sidereal_rotation_rate
 from sunpy.time import parse_time
@@ -724,6 +732,18 @@ def test_hgs_hci_sunspice():
     assert_quantity_allclose(new.distance, old.radius)
 
 
+def test_hgs_hci_2d_obstime():
+    # Test HGS->HCI with a 2D array of obstimes, which needs the Z axis broadcast to that shape
+    obstime = Time('2019-06-01') + np.arange(6).reshape(2, 3) * u.day
+    old = SkyCoord(np.full((2, 3), 120)*u.deg, 10*u.deg, 1*u.AU,
+                   frame=HeliographicStonyhurst(obstime=obstime))
+    new = old.transform_to(HeliocentricInertial(obstime=obstime))
+
+    assert new.shape == (2, 3)
+    expected = old[1, 2].transform_to(HeliocentricInertial(obstime=obstime[1, 2]))
+    assert_quantity_allclose(new[1, 2].lon, expected.lon)
+
+
 def test_hci_hci():
     # Test HCI loopback transformation
     obstime = Time('2001-01-01')
@@ -785,6 +805,15 @@ def test_gei_gei():
     assert_quantity_allclose(new.xyz, gei_d.xyz)
 
 
+def test_gei_gei_array_equinox():
+    # Test that the GEI loopback transformation is a no-op for matching array-valued equinoxes
+    t = Time(['2001-01-01', '2001-02-01'])
+    old = GeocentricEarthEquatorial([1, 2]*u.deg, [3, 4]*u.deg, [1, 2]*u.AU, obstime=t, equinox=t)
+    new = old.transform_to(GeocentricEarthEquatorial(obstime=t, equinox=t))
+
+    assert_quantity_allclose(new.cartesian.xyz, old.cartesian.xyz)
+
+
 def test_no_observer():
     # Tests transformations to and from observer-based frames with no observer defined
     frames_in = [Heliocentric(0*u.km, 0*u.km, 0*u.km, observer=None),
@@ -940,3 +969,31 @@ def test_transform_with_sun_center_reset():
     assert_quantity_allclose(result3.lon, result1.lon)
     assert_quantity_allclose(result3.lat, result1.lat)
     assert_quantity_allclose(result3.distance, result1.distance)
+
+
+def test_sun_detilt_matrix():
+    # The hard-coded matrix should match the matrix calculated from the solar north pole
+    expected = _rotation_matrix_reprs_to_reprs(_SOLAR_NORTH_POLE_HCRS,
+                                               CartesianRepresentation(0, 0, 1))
+    assert np.allclose(_SUN_DETILT_MATRIX, expected, rtol=0, atol=1e-15)
+
+
+def test_times_are_equal():
+    t = Time('2001-01-01') + np.arange(3) * u.day
+    assert _times_are_equal(t, t.copy())
+    assert _times_are_equal(t, t.tt)  # different scales are compared as the same instants
+    assert _times_are_equal(t[0], Time([t[0]] * 2))  # comparisons broadcast
+    assert not _times_are_equal(t, t + 1*u.s)
+    assert not _times_are_equal(t, None)
+    assert _times_are_equal(None, None)
+
+
+def test_cached_matrices_read_only():
+    # The cached matrices and Sun position are shared by every caller, so must not be modifiable
+    matrix, sun_pos_icrs = _matrix_hcrs_to_hgs(Time('2001-01-01'))
+    assert not matrix.flags.writeable
+    assert not sun_pos_icrs.x.flags.writeable
+    with pytest.raises(ValueError):
+        matrix[0, 0] = 0
+
+    assert not _rotation_matrix_obliquity(_J2000).flags.writeable
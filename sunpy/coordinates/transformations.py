@@ -13,8 +13,8 @@ This module contains the functions for converting one
 
 """
 import logging
-from copy import deepcopy
-from functools import wraps
+import weakref
+from functools import wraps, lru_cache
 from contextlib import contextmanager
 
 import numpy as np
@@ -28,11 +28,12 @@ from astropy.coordinates import (
     ConvertError,
     HeliocentricMeanEcliptic,
     get_body_barycentric,
+    solar_system_ephemeris,
 )
 from astropy.coordinates.baseframe import frame_transform_graph
 from astropy.coordinates.builtin_frames import make_transform_graph_docs
 from astropy.coordinates.builtin_frames.utils import get_jd12
-from astropy.coordinates.matrix_utilities import matrix_product, matrix_transpose, rotation_matrix
+from astropy.coordinates.matrix_utilities import matrix_transpose, rotation_matrix
 from astropy.coordinates.representation import (
     CartesianRepresentation,
     SphericalRepresentation,
@@ -40,7 +41,12 @@ from astropy.coordinates.representation import (
 )
 # Import erfa via astropy to make sure we are using the same ERFA library as Astropy
 from astropy.coordinates.sky_coordinate import erfa
-from astropy.coordinates.transformations import FunctionTransform, FunctionTransformWithFiniteDifference
+from astropy.coordinates.transformations import (
+    FunctionTransform,
+    FunctionTransformWithFiniteDifference,
+    TransformGraph,
+)
+from astropy.time import Time
 
 from sunpy import log
 from sunpy.sun import constants
@@ -210,10 +216,26 @@ def _observers_are_equal(obs_1, obs_2):
         raise ConvertError("The destination observer needs to have `obstime` set because the "
                            "source observer is different.")
 
-    return np.atleast_1d((u.allclose(obs_1.lat, obs_2.lat) and
-                          u.allclose(obs_1.lon, obs_2.lon) and
-                          u.allclose(obs_1.radius, obs_2.radius) and
-                          obs_1.obstime == obs_2.obstime)).all()
+    # Compare the obstimes first since that is cheaper than comparing the positions
+    if not _times_are_equal(obs_1.obstime, obs_2.obstime):
+        return False
+
+    # Compare the positions as plain values rather than as quantities, with the same default
+    # tolerance as u.allclose() (the representations are used because frame attribute access is
+    # comparatively slow)
+    sph_1 = obs_1.data.represent_as(SphericalRepresentation)
+    sph_2 = obs_2.data.represent_as(SphericalRepresentation)
+    value_pairs = ((sph_1.lat.value, sph_2.lat.to_value(sph_1.lat.unit)),
+                   (sph_1.lon.value, sph_2.lon.to_value(sph_1.lon.unit)),
+                   (sph_1.distance.value, sph_2.distance.to_value(sph_1.distance.unit)))
+
+    if obs_1.isscalar and obs_2.isscalar:
+        # Plain float arithmetic is faster than calling into NumPy for scalar observers
+        return all(abs(value_1 - value_2) <= 1e-5 * abs(value_2)
+                   for value_1, value_2 in value_pairs)
+
+    return all(np.allclose(value_1, value_2, rtol=1e-5, atol=0)
+               for value_1, value_2 in value_pairs)
 
 
 def _check_observer_defined(frame):
@@ -235,6 +257,21 @@ def _check_observer_defined(frame):
 # =============================================================================
 
 
+def _times_are_equal(time_1, time_2):
+    """
+    Return whether two times (or arrays of times) are equal, which is checked by identity first
+    and, if both times have the same scale, by comparing their internal Julian dates directly
+    instead of through `~astropy.time.Time` arithmetic
+    """
+    if time_1 is time_2:
+        return True
+    if time_1 is None or time_2 is None:
+        return False
+    if time_1.scale == time_2.scale:
+        return bool(np.all((time_1.jd1 - time_2.jd1) + (time_1.jd2 - time_2.jd2) == 0))
+    return bool(np.all(time_1 == time_2))
+
+
 def _transform_obstime(frame, obstime):
     """
     Transform a frame to a new obstime using the appropriate loopback transformation.
@@ -242,37 +279,52 @@ def _transform_obstime(frame, obstime):
     If the frame's obstime is None, the frame is copied with the new obstime.
     """
     # If obstime is None or the obstime matches, nothing needs to be done
-    if obstime is None or np.all(frame.obstime == obstime):
+    frame_obstime = frame.obstime
+    if obstime is None or _times_are_equal(frame_obstime, obstime):
         return frame
 
     # Transform to the new obstime using the appropriate loopback transformation
     new_frame = frame.replicate(obstime=obstime)
-    if frame.obstime is not None:
+    if frame_obstime is not None:
         return frame.transform_to(new_frame)
     else:
         return new_frame
 
 
-def _rotation_matrix_hgs_to_hgc(obstime, observer_distance_from_sun):
+def _rotation_angle_hgs_to_hgc(obstime, observer_distance_from_sun):
     """
-    Return the rotation matrix from HGS to HGC at the same observation time
+    Return the rotation angle about the Z axis from HGS to HGC at the same observation time
     """
     if obstime is None:
         raise ConvertError("To perform this transformation, the coordinate"
                            " frame needs a specified `obstime`.")
 
     # Import here to avoid a circular import
-    from .sun import L0, earth_distance
+    from .sun import L0
 
     # Calculate the difference in light travel time if the observer is at a different distance from
     # the Sun than the Earth is
-    delta_time = (observer_distance_from_sun - earth_distance(obstime)) / speed_of_light
+    delta_time = (observer_distance_from_sun - _sun_earth_icrf(obstime).norm()) / speed_of_light
 
     # Calculate the corresponding difference in apparent longitude
     delta_lon = delta_time * constants.sidereal_rotation_rate
 
     # Rotation is only in longitude, so only around the Z axis
-    return rotation_matrix(-(L0(obstime) + delta_lon), 'z')
+    return -(L0(obstime) + delta_lon)
+
+
+def _rotate_about_z(cartesian, angle):
+    """
+    Rotate a Cartesian representation about the Z axis by an angle
+
+    This is equivalent to applying ``rotation_matrix(angle, 'z')``, but operates directly on the X
+    and Y components rather than constructing and applying the full matrix.
+    """
+    angle = angle.to_value(u.rad)
+    cos_angle, sin_angle = np.cos(angle), np.sin(angle)
+    return CartesianRepresentation(cos_angle * cartesian.x + sin_angle * cartesian.y,
+                                   -sin_angle * cartesian.x + cos_angle * cartesian.y,
+                                   cartesian.z, copy=False)
 
 
 @frame_transform_graph.transform(FunctionTransformWithFiniteDifference,
@@ -292,8 +344,8 @@ def hgs_to_hgc(hgscoord, hgcframe):
     int_coord = _transform_obstime(hgscoord, hgcframe.obstime)
 
     # Rotate from HGS to HGC
-    total_matrix = _rotation_matrix_hgs_to_hgc(int_coord.obstime, observer_radius)
-    newrepr = int_coord.cartesian.transform(total_matrix)
+    angle = _rotation_angle_hgs_to_hgc(int_coord.obstime, observer_radius)
+    newrepr = _rotate_about_z(int_coord.cartesian, angle)
 
     return hgcframe._replicate(newrepr, obstime=int_coord.obstime)
 
@@ -315,24 +367,21 @@ def hgc_to_hgs(hgccoord, hgsframe):
     int_coord = _transform_obstime(hgccoord, hgsframe.obstime)
 
     # Rotate from HGC to HGS
-    total_matrix = matrix_transpose(_rotation_matrix_hgs_to_hgc(int_coord.obstime,
-                                                                observer_radius))
-    newrepr = int_coord.cartesian.transform(total_matrix)
+    angle = _rotation_angle_hgs_to_hgc(int_coord.obstime, observer_radius)
+    newrepr = _rotate_about_z(int_coord.cartesian, -angle)
 
     return hgsframe._replicate(newrepr, obstime=int_coord.obstime)
 
 
-def _matrix_hcc_to_hpc():
-    # Returns the transformation matrix that permutes/swaps axes from HCC to HPC
-
-    # HPC spherical coordinates are a left-handed frame with these equivalent Cartesian axes:
-    #   HPC_X = -HCC_Z
-    #   HPC_Y = HCC_X
-    #   HPC_Z = HCC_Y
-    # (HPC_X and HPC_Y are not to be confused with HPC_Tx and HPC_Ty)
-    return np.array([[0, 0, -1],
-                     [1, 0, 0],
-                     [0, 1, 0]])
+# The transformation matrix that permutes/swaps axes from HCC to HPC
+# HPC spherical coordinates are a left-handed frame with these equivalent Cartesian axes:
+#   HPC_X = -HCC_Z
+#   HPC_Y = HCC_X
+#   HPC_Z = HCC_Y
+# (HPC_X and HPC_Y are not to be confused with HPC_Tx and HPC_Ty)
+_MATRIX_HCC_TO_HPC = np.array([[0., 0., -1.],
+                               [1., 0., 0.],
+                               [0., 1., 0.]])
 
 
 @frame_transform_graph.transform(FunctionTransformWithFiniteDifference,
@@ -352,12 +401,12 @@ def hcc_to_hpc(helioccoord, heliopframe):
     int_frame = Heliocentric(obstime=observer.obstime, observer=observer)
     int_coord = helioccoord.transform_to(int_frame)
 
-    # Shift the origin from the Sun to the observer
+    # Permute/swap axes from HCC to HPC equivalent Cartesian and shift the origin from the Sun to
+    # the observer in a single affine operation, where the shift of -distance along HCC_Z becomes a
+    # shift of +distance along HPC_X
     distance = int_coord.observer.radius
-    newrepr = int_coord.cartesian - CartesianRepresentation(0*u.m, 0*u.m, distance)
-
-    # Permute/swap axes from HCC to HPC equivalent Cartesian
-    newrepr = newrepr.transform(_matrix_hcc_to_hpc())
+    offset = CartesianRepresentation(distance, 0*distance, 0*distance)
+    newrepr = _apply_affine_params(int_coord.cartesian, _MATRIX_HCC_TO_HPC, offset)
 
     # Explicitly represent as spherical because external code (e.g., wcsaxes) expects it
     return heliopframe.realize_frame(newrepr.represent_as(SphericalRepresentation))
@@ -375,15 +424,27 @@ def hpc_to_hcc(heliopcoord, heliocframe):
 
     heliopcoord = heliopcoord.make_3d()
 
-    # Permute/swap axes from HPC equivalent Cartesian to HCC
-    newrepr = heliopcoord.cartesian.transform(matrix_transpose(_matrix_hcc_to_hpc()))
+    # Convert from HPC spherical to HCC Cartesian directly, which combines the conversion to the HPC
+    # equivalent Cartesian with the permutation/swap of axes given by _MATRIX_HCC_TO_HPC
+    hpcrepr = heliopcoord.spherical
+    lon = hpcrepr.lon.to_value(u.rad)
+    lat = hpcrepr.lat.to_value(u.rad)
+    distance = hpcrepr.distance
+    cos_lat = np.cos(lat)
 
     # Transform the HPC observer (in HGS) to the HPC obstime in case it's different
     observer = _transform_obstime(heliopcoord.observer, heliopcoord.obstime)
-
-    # Shift the origin from the observer to the Sun
-    distance = observer.radius
-    newrepr += CartesianRepresentation(0*u.m, 0*u.m, distance)
+    observer_distance = observer.radius.to_value(distance.unit)
+
+    # The components are written into a single pre-allocated array to avoid temporaries, and the
+    # shift of the origin from the observer to the Sun is applied to that array in place
+    xyz = np.empty((3,) + np.broadcast(lon, observer_distance).shape)
+    np.multiply(cos_lat, np.sin(lon), out=xyz[0, ...])
+    np.sin(lat, out=xyz[1, ...])
+    np.multiply(-cos_lat, np.cos(lon), out=xyz[2, ...])
+    xyz *= distance.value
+    xyz[2, ...] += observer_distance
+    newrepr = CartesianRepresentation(xyz, unit=distance.unit, copy=False)
 
     # Complete the conversion of HPC to HCC at the obstime and observer of the HPC coord
     int_coord = Heliocentric(newrepr, obstime=observer.obstime, observer=observer)
@@ -395,19 +456,25 @@ def hpc_to_hcc(heliopcoord, heliocframe):
 def _rotation_matrix_hcc_to_hgs(longitude, latitude):
     # Returns the rotation matrix from HCC to HGS based on the observer longitude and latitude
 
-    # Permute the axes of HCC to match HGS Cartesian equivalent
-    #   HGS_X = HCC_Z
-    #   HGS_Y = HCC_X
-    #   HGS_Z = HCC_Y
-    axes_matrix = np.array([[0, 0, 1],
-                            [1, 0, 0],
-                            [0, 1, 0]])
+    # The matrix is the composition of the following steps, which is constructed directly rather
+    # than as a product of three separate matrices:
+    #   1. Permute the axes of HCC to match HGS Cartesian equivalent
+    #        HGS_X = HCC_Z
+    #        HGS_Y = HCC_X
+    #        HGS_Z = HCC_Y
+    #   2. Rotate in latitude about the Y axis
+    #   3. Rotate in longitude about the Z axis (sign difference because of direction difference)
+    lon = longitude.to_value(u.rad)
+    lat = latitude.to_value(u.rad)
+    cos_lon, sin_lon = np.cos(lon), np.sin(lon)
+    cos_lat, sin_lat = np.cos(lat), np.sin(lat)
 
-    # Rotate in latitude and longitude (sign difference because of direction difference)
-    lat_matrix = rotation_matrix(latitude, 'y')
-    lon_matrix = rotation_matrix(-longitude, 'z')
+    matrix = np.array([[-sin_lon, -cos_lon * sin_lat, cos_lon * cos_lat],
+                       [cos_lon, -sin_lon * sin_lat, sin_lon * cos_lat],
+                       [np.zeros_like(lon), cos_lat, sin_lat]])
 
-    return lon_matrix @ lat_matrix @ axes_matrix
+    # For array-valued observers, move the matrix dimensions to be the last two dimensions
+    return np.moveaxis(matrix, (0, 1), (-2, -1))
 
 
 @frame_transform_graph.transform(FunctionTransformWithFiniteDifference,
@@ -465,7 +532,7 @@ def hpc_to_hpc(from_coo, to_frame):
     It does this by transforming through HGS.
     """
     if _observers_are_equal(from_coo.observer, to_frame.observer) and \
-       np.all(from_coo.obstime == to_frame.obstime):
+       _times_are_equal(from_coo.obstime, to_frame.obstime):
         return to_frame.realize_frame(from_coo.data)
 
     _check_observer_defined(from_coo)
@@ -482,18 +549,23 @@ def _rotation_matrix_reprs_to_reprs(start_representation, end_representation):
     Return the matrix for the direct rotation from one representation to a second representation.
     The representations need not be normalized first, and can be arrays of representations.
     """
-    A = start_representation.to_cartesian()
-    B = end_representation.to_cartesian()
-    rotation_axis = A.cross(B)
-    rotation_angle = -np.arccos(A.dot(B) / (A.norm() * B.norm()))  # negation is required
-
-    if rotation_angle.isscalar:
-        # This line works around some input/output quirks of Astropy's rotation_matrix()
-        matrix = np.array(rotation_matrix(rotation_angle, rotation_axis.xyz.value.tolist()))
-    else:
-        matrix_list = [np.array(rotation_matrix(angle, axis.xyz.value.tolist()))
-                       for angle, axis in zip(rotation_angle, rotation_axis)]
-        matrix = np.stack(matrix_list)
+    # The calculation is performed on the underlying arrays, with the Cartesian components along the
+    # last dimension, because the Quantity overhead dominates for the common scalar case
+    A = start_representation.to_cartesian().get_xyz(xyz_axis=-1).value
+    B = end_representation.to_cartesian().get_xyz(xyz_axis=-1).value
+    rotation_axis = np.cross(A, B)
+    cos_angle = np.sum(A * B, axis=-1) / np.sqrt(np.sum(A**2, axis=-1) * np.sum(B**2, axis=-1))
+    rotation_angle = np.arccos(cos_angle)
+
+    # Rodrigues' rotation formula, evaluated for all of the representations at once
+    axis = rotation_axis / np.sqrt(np.sum(rotation_axis**2, axis=-1))[..., np.newaxis]
+    c = np.cos(rotation_angle)
+    s = np.sin(rotation_angle)
+    x, y, z = np.moveaxis(axis * s[..., np.newaxis], -1, 0)
+    matrix = (np.einsum('...i,...j->...ij', axis, axis) * (1 - c)[..., np.newaxis, np.newaxis]
+              + np.moveaxis(np.array([[c, -z, y],
+                                      [z, c, -x],
+                                      [-y, x, c]]), (0, 1), (-2, -1)))
 
     return matrix
 
@@ -506,8 +578,7 @@ def _rotation_matrix_reprs_to_xz_about_z(representations):
     A = representations.to_cartesian()
 
     # Zero out the Z components
-    # (The additional transpose operations are to handle both scalar and array inputs)
-    A_no_z = CartesianRepresentation((A.xyz.T * [1, 1, 0]).T)
+    A_no_z = CartesianRepresentation(A.x, A.y, np.zeros_like(A.z), copy=False)
 
     # Rotate the resulting vector to the X axis
     x_axis = CartesianRepresentation(1, 0, 0)
@@ -516,12 +587,41 @@ def _rotation_matrix_reprs_to_xz_about_z(representations):
     return matrix
 
 
+def _get_body_barycentric(body, time):
+    """
+    Return the output of `~astropy.coordinates.get_body_barycentric`, cached for scalar times
+    because many coordinates are typically transformed at only a handful of distinct times.
+    """
+    if time.isscalar:
+        return _cached_body_barycentric(body, time.jd1, time.jd2, time.scale,
+                                        solar_system_ephemeris.get())
+    return get_body_barycentric(body, time)
+
+
+# The ephemeris is part of the key because the body positions depend on it
+# (The key ignores `Time.location`, which only changes the TDB time used for the ephemeris lookup
+# by at most a few microseconds)
+@lru_cache(maxsize=256)
+def _cached_body_barycentric(body, jd1, jd2, scale, ephemeris):
+    return _make_read_only(get_body_barycentric(body, Time(jd1, jd2, format='jd', scale=scale)))
+
+
+def _make_read_only(representation):
+    """
+    Mark the component arrays of a representation as read-only, so that a cached representation,
+    which is shared by every caller, cannot be modified in place
+    """
+    for component in representation.components:
+        getattr(representation, component).flags.writeable = False
+    return representation
+
+
 def _sun_earth_icrf(time):
     """
     Return the Sun-Earth vector for ICRF-based frames.
     """
-    sun_pos_icrs = get_body_barycentric('sun', time)
-    earth_pos_icrs = get_body_barycentric('earth', time)
+    sun_pos_icrs = _get_body_barycentric('sun', time)
+    earth_pos_icrs = _get_body_barycentric('earth', time)
     return earth_pos_icrs - sun_pos_icrs
 
 
@@ -533,27 +633,30 @@ _SOLAR_NORTH_POLE_HCRS = UnitSphericalRepresentation(lon=constants.get('alpha_0'
                                                      lat=constants.get('delta_0'))
 
 
-# Calculate the rotation matrix to de-tilt the Sun's rotation axis to be parallel to the Z axis
-_SUN_DETILT_MATRIX = _rotation_matrix_reprs_to_reprs(_SOLAR_NORTH_POLE_HCRS,
-                                                     CartesianRepresentation(0, 0, 1))
+# The rotation matrix to de-tilt the Sun's rotation axis to be parallel to the Z axis
+# This is a constant, equal to the following (which is checked in the tests):
+#   _rotation_matrix_reprs_to_reprs(_SOLAR_NORTH_POLE_HCRS, CartesianRepresentation(0, 0, 1))
+_SUN_DETILT_MATRIX = np.array([[0.9921117081712713, 0.02727601775551874, -0.12235349347232781],
+                               [0.02727601775551874, 0.9056853928895188, 0.4230720836476432],
+                               [0.12235349347232781, -0.4230720836476432, 0.89779710106079]])
 
 
-def _affine_params_hcrs_to_hgs(hcrs_time, hgs_time):
+def _matrix_hcrs_to_hgs(hgs_time):
     """
-    Return the affine parameters (matrix and offset) from HCRS to HGS
-
-    HGS shares the same origin (the Sun) as HCRS, but has its Z axis aligned with the Sun's
-    rotation axis and its X axis aligned with the projection of the Sun-Earth vector onto the Sun's
-    equatorial plane (i.e., the component of the Sun-Earth vector perpendicular to the Z axis).
-    Thus, the transformation matrix is the product of the matrix to align the Z axis (by de-tilting
-    the Sun's rotation axis) and the matrix to align the X axis.  The first matrix is independent
-    of time and is pre-computed, while the second matrix depends on the time-varying Sun-Earth
-    vector.
+    Return the rotation matrix from HCRS to HGS and the position of the Sun in ICRS, which are
+    cached for a scalar time
     """
+    if hgs_time.isscalar:
+        return _cached_matrix_hcrs_to_hgs(hgs_time.jd1, hgs_time.jd2, hgs_time.scale,
+                                          solar_system_ephemeris.get())
+    return _compute_matrix_hcrs_to_hgs(hgs_time)
+
+
+def _compute_matrix_hcrs_to_hgs(hgs_time):
     # Determine the Sun-Earth vector in ICRS
     # Since HCRS is ICRS with an origin shift, this is also the Sun-Earth vector in HCRS
-    sun_pos_icrs = get_body_barycentric('sun', hgs_time)
-    earth_pos_icrs = get_body_barycentric('earth', hgs_time)
+    sun_pos_icrs = _get_body_barycentric('sun', hgs_time)
+    earth_pos_icrs = _get_body_barycentric('earth', hgs_time)
     sun_earth = earth_pos_icrs - sun_pos_icrs
 
     # De-tilt the Sun-Earth vector to the frame with the Sun's rotation axis parallel to the Z axis
@@ -562,12 +665,41 @@ def _affine_params_hcrs_to_hgs(hcrs_time, hgs_time):
     # Rotate the Sun-Earth vector about the Z axis so that it lies in the XZ plane
     rot_matrix = _rotation_matrix_reprs_to_xz_about_z(sun_earth_detilt)
 
-    total_matrix = rot_matrix @ _SUN_DETILT_MATRIX
+    return rot_matrix @ _SUN_DETILT_MATRIX, sun_pos_icrs
+
+
+# The ephemeris is part of the key because the Sun and Earth positions depend on it
+# (As for `_cached_body_barycentric`, the key ignores `Time.location`)
+@lru_cache(maxsize=1024)
+def _cached_matrix_hcrs_to_hgs(jd1, jd2, scale, ephemeris):
+    """
+    Return the output of `_compute_matrix_hcrs_to_hgs` for a scalar time, cached by its Julian date
+
+    The returned matrix and position are read-only because they are shared by every caller.
+    """
+    matrix, sun_pos_icrs = _compute_matrix_hcrs_to_hgs(Time(jd1, jd2, format='jd', scale=scale))
+    matrix.flags.writeable = False
+    return matrix, _make_read_only(sun_pos_icrs)
+
+
+def _affine_params_hcrs_to_hgs(hcrs_time, hgs_time):
+    """
+    Return the affine parameters (matrix and offset) from HCRS to HGS
+
+    HGS shares the same origin (the Sun) as HCRS, but has its Z axis aligned with the Sun's
+    rotation axis and its X axis aligned with the projection of the Sun-Earth vector onto the Sun's
+    equatorial plane (i.e., the component of the Sun-Earth vector perpendicular to the Z axis).
+    Thus, the transformation matrix is the product of the matrix to align the Z axis (by de-tilting
+    the Sun's rotation axis) and the matrix to align the X axis.  The first matrix is independent
+    of time and is pre-computed, while the second matrix depends on the time-varying Sun-Earth
+    vector.
+    """
+    total_matrix, sun_pos_icrs = _matrix_hcrs_to_hgs(hgs_time)
 
     # All of the above is calculated for the HGS observation time
     # If the HCRS observation time is different, calculate the translation in origin
-    if not _ignore_sun_motion and np.any(hcrs_time != hgs_time):
-        sun_pos_old_icrs = get_body_barycentric('sun', hcrs_time)
+    if not _ignore_sun_motion and not _times_are_equal(hcrs_time, hgs_time):
+        sun_pos_old_icrs = _get_body_barycentric('sun', hcrs_time)
         offset_icrf = sun_pos_icrs - sun_pos_old_icrs
     else:
         offset_icrf = sun_pos_icrs * 0  # preserves obstime shape
@@ -576,6 +708,25 @@ def _affine_params_hcrs_to_hgs(hcrs_time, hgs_time):
     return total_matrix, offset
 
 
+def _apply_affine_params(representation, matrix, offset):
+    """
+    Apply a rotation matrix and then an offset to a Cartesian representation
+
+    The arithmetic is performed on the underlying arrays in the unit of the input representation,
+    so that only the output representation needs to be constructed.
+    """
+    unit = representation.x.unit
+    xyz = representation.get_xyz(xyz_axis=-1).to_value(unit)
+    offset_xyz = offset.get_xyz(xyz_axis=-1).to_value(unit)
+
+    if matrix.ndim == 2:
+        # A single matrix is applied to all of the vectors at once as a BLAS-backed matrix product
+        newxyz = xyz @ matrix.T
+    else:
+        newxyz = np.einsum('...ij,...j->...i', matrix, xyz)
+    return CartesianRepresentation(newxyz + offset_xyz, xyz_axis=-1, unit=unit, copy=False)
+
+
 @frame_transform_graph.transform(FunctionTransformWithFiniteDifference,
                                  HCRS, HeliographicStonyhurst)
 @_transformation_debug("HCRS->HGS")
@@ -593,7 +744,7 @@ def hcrs_to_hgs(hcrscoord, hgsframe):
 
     rot_matrix, offset = _affine_params_hcrs_to_hgs(hcrscoord.obstime, hgsframe.obstime)
 
-    return hgsframe.realize_frame(hcrscoord.cartesian.transform(rot_matrix) + offset)
+    return hgsframe.realize_frame(_apply_affine_params(hcrscoord.cartesian, rot_matrix, offset))
 
 
 @frame_transform_graph.transform(FunctionTransformWithFiniteDifference,
@@ -618,7 +769,8 @@ def hgs_to_hcrs(hgscoord, hcrsframe):
     reverse_matrix = matrix_transpose(forward_matrix)
     reverse_offset = -forward_offset
 
-    return hcrsframe.realize_frame(hgscoord.cartesian.transform(reverse_matrix) + reverse_offset)
+    return hcrsframe.realize_frame(_apply_affine_params(hgscoord.cartesian,
+                                                        reverse_matrix, reverse_offset))
 
 
 @frame_transform_graph.transform(FunctionTransformWithFiniteDifference,
@@ -630,10 +782,19 @@ def hgs_to_hgs(from_coo, to_frame):
     """
     if to_frame.obstime is None:
         return from_coo.replicate()
-    elif np.all(from_coo.obstime == to_frame.obstime):
+    elif _times_are_equal(from_coo.obstime, to_frame.obstime):
         return to_frame.realize_frame(from_coo.data)
+    elif from_coo.obstime is None:
+        raise ConvertError("To perform this transformation, the HeliographicStonyhurst"
+                           " frame needs a specified `obstime`.")
     else:
-        return from_coo.transform_to(HCRS(obstime=from_coo.obstime)).transform_to(to_frame)
+        # Compose HGS->HCRS at the original obstime with HCRS->HGS at the new obstime into a single
+        # affine transformation rather than going through an intermediate HCRS coord
+        from_matrix, _ = _matrix_hcrs_to_hgs(from_coo.obstime)
+        to_matrix, offset = _affine_params_hcrs_to_hgs(from_coo.obstime, to_frame.obstime)
+        total_matrix = to_matrix @ matrix_transpose(from_matrix)
+        newrepr = _apply_affine_params(from_coo.cartesian, total_matrix, offset)
+        return to_frame.realize_frame(newrepr)
 
 
 @frame_transform_graph.transform(FunctionTransformWithFiniteDifference,
@@ -644,7 +805,7 @@ def hgc_to_hgc(from_coo, to_frame):
     Convert between two Heliographic Carrington frames.
     """
     if _observers_are_equal(from_coo.observer, to_frame.observer) and \
-       np.all(from_coo.obstime == to_frame.obstime):
+       _times_are_equal(from_coo.obstime, to_frame.obstime):
         return to_frame.realize_frame(from_coo.data)
 
     _check_observer_defined(from_coo)
@@ -664,7 +825,7 @@ def hcc_to_hcc(from_coo, to_frame):
     Convert between two Heliocentric frames.
     """
     if _observers_are_equal(from_coo.observer, to_frame.observer) and \
-       np.all(from_coo.obstime == to_frame.obstime):
+       _times_are_equal(from_coo.obstime, to_frame.obstime):
         return to_frame.realize_frame(from_coo.data)
 
     _check_observer_defined(from_coo)
@@ -684,14 +845,15 @@ def _rotation_matrix_hme_to_hee(hmeframe):
     sun_earth = HCRS(_sun_earth_icrf(hmeframe.obstime), obstime=hmeframe.obstime)
     sun_earth_hme = sun_earth.transform_to(hmeframe).cartesian
 
-    # Rotate the Sun-Earth vector about the Z axis so that it lies in the XZ plane
-    rot_matrix = _rotation_matrix_reprs_to_xz_about_z(sun_earth_hme)
-
-    # Tilt the rotated Sun-Earth vector so that it is aligned with the X axis
-    tilt_matrix = _rotation_matrix_reprs_to_reprs(sun_earth_hme.transform(rot_matrix),
-                                                  CartesianRepresentation(1, 0, 0))
-
-    return matrix_product(tilt_matrix, rot_matrix)
+    # The rotation about the Z axis that brings the Sun-Earth vector into the XZ plane, followed by
+    # the tilt that aligns it with the X axis, is constructed directly as a single matrix
+    # The rows of the matrix are the HEE X, Y, and Z axes expressed in HME
+    ex, ey, ez = sun_earth_hme.xyz.value / sun_earth_hme.norm().value
+    rho = np.sqrt(ex**2 + ey**2)
+    matrix = np.array([[ex, ey, ez],
+                       [-ey / rho, ex / rho, np.zeros_like(rho)],
+                       [-ez * ex / rho, -ez * ey / rho, rho]])
+    return np.moveaxis(matrix, (0, 1), (-2, -1))
 
 
 @frame_transform_graph.transform(FunctionTransformWithFiniteDifference,
@@ -745,10 +907,10 @@ def hee_to_hee(from_coo, to_frame):
     """
     Convert between two Heliocentric Earth Ecliptic frames.
     """
-    if np.all(from_coo.obstime == to_frame.obstime):
-        return to_frame.realize_frame(from_coo.data)
-    elif to_frame.obstime is None:
+    if to_frame.obstime is None:
         return from_coo
+    elif _times_are_equal(from_coo.obstime, to_frame.obstime):
+        return to_frame.realize_frame(from_coo.data)
     else:
         return from_coo.transform_to(HCRS(obstime=from_coo.obstime)).transform_to(to_frame)
 
@@ -767,16 +929,13 @@ def hee_to_gse(heecoord, gseframe):
         raise ConvertError("To perform this transformation, the coordinate"
                            " frame needs a specified `obstime`.")
 
-    # Import here to avoid a circular import
-    from .sun import earth_distance
-
     # Find the Earth-object vector in the intermediate frame
-    sun_earth_int = earth_distance(int_coord.obstime) * CartesianRepresentation(1, 0, 0)
+    sun_earth_int = _sun_earth_icrf(int_coord.obstime).norm() * CartesianRepresentation(1, 0, 0)
     earth_object_int = int_coord.cartesian - sun_earth_int
 
     # Flip the vector in X and Y, but leave Z untouched
-    # (The additional transpose operations are to handle both scalar and array inputs)
-    newrepr = CartesianRepresentation((earth_object_int.xyz.T * [-1, -1, 1]).T)
+    newrepr = CartesianRepresentation(-earth_object_int.x, -earth_object_int.y, earth_object_int.z,
+                                      copy=False)
 
     return gseframe._replicate(newrepr, obstime=int_coord.obstime)
 
@@ -795,16 +954,13 @@ def gse_to_hee(gsecoord, heeframe):
         raise ConvertError("To perform this transformation, the coordinate"
                            " frame needs a specified `obstime`.")
 
-    # Import here to avoid a circular import
-    from .sun import earth_distance
-
     # Find the Sun-object vector in the intermediate frame
-    earth_sun_int = earth_distance(int_coord.obstime) * CartesianRepresentation(1, 0, 0)
+    earth_sun_int = _sun_earth_icrf(int_coord.obstime).norm() * CartesianRepresentation(1, 0, 0)
     sun_object_int = int_coord.cartesian - earth_sun_int
 
     # Flip the vector in X and Y, but leave Z untouched
-    # (The additional transpose operations are to handle both scalar and array inputs)
-    newrepr = CartesianRepresentation((sun_object_int.xyz.T * [-1, -1, 1]).T)
+    newrepr = CartesianRepresentation(-sun_object_int.x, -sun_object_int.y, sun_object_int.z,
+                                      copy=False)
 
     return heeframe._replicate(newrepr, obstime=int_coord.obstime)
 
@@ -816,7 +972,7 @@ def gse_to_gse(from_coo, to_frame):
     """
     Convert between two Geocentric Solar Ecliptic frames.
     """
-    if np.all(from_coo.obstime == to_frame.obstime):
+    if _times_are_equal(from_coo.obstime, to_frame.obstime):
         return to_frame.realize_frame(from_coo.data)
     else:
         heecoord = from_coo.transform_to(HeliocentricEarthEcliptic(obstime=from_coo.obstime))
@@ -829,7 +985,8 @@ def _rotation_matrix_hgs_to_hci(obstime):
     """
     z_axis = CartesianRepresentation(0, 0, 1)*u.m
     if not obstime.isscalar:
-        z_axis = z_axis._apply('repeat', obstime.size)
+        # Broadcast (without copying) the Z axis to the shape of the array-valued obstime
+        z_axis = z_axis._apply(np.broadcast_to, obstime.shape, subok=True)
 
     # Get the ecliptic pole in HGS
     ecliptic_pole = HeliocentricMeanEcliptic(z_axis, obstime=obstime, equinox=_J2000)
@@ -838,7 +995,11 @@ def _rotation_matrix_hgs_to_hci(obstime):
     # Rotate the ecliptic pole to the -YZ plane, which aligns the solar ascending node with the X
     # axis
     rot_matrix = _rotation_matrix_reprs_to_xz_about_z(ecliptic_pole_hgs.cartesian)
-    xz_to_yz_matrix = rotation_matrix(-90*u.deg, 'z')
+
+    # Rotation by -90 degrees about the Z axis, constructed directly
+    xz_to_yz_matrix = np.array([[0, -1, 0],
+                                [1, 0, 0],
+                                [0, 0, 1]])
 
     return xz_to_yz_matrix @ rot_matrix
 
@@ -892,7 +1053,7 @@ def hci_to_hci(from_coo, to_frame):
     """
     Convert between two Heliocentric Inertial frames.
     """
-    if np.all(from_coo.obstime == to_frame.obstime):
+    if _times_are_equal(from_coo.obstime, to_frame.obstime):
         return to_frame.realize_frame(from_coo.data)
     else:
         return from_coo.transform_to(HeliographicStonyhurst(obstime=from_coo.obstime)).\
@@ -903,7 +1064,26 @@ def _rotation_matrix_obliquity(time):
     """
     Return the rotation matrix from Earth equatorial to ecliptic coordinates
     """
-    return rotation_matrix(erfa.obl06(*get_jd12(time, 'tt'))*u.radian, 'x')
+    # The matrix is cached for each equinox because the same equinox, typically the default of
+    # J2000.0, is used repeatedly (array-valued times are not hashable, so are always calculated)
+    try:
+        return _OBLIQUITY_MATRIX_CACHE[time]
+    except (KeyError, TypeError):
+        pass
+
+    matrix = rotation_matrix(erfa.obl06(*get_jd12(time, 'tt'))*u.radian, 'x')
+    # The cached matrix is shared by every caller, so it is made read-only
+    matrix.flags.writeable = False
+    try:
+        _OBLIQUITY_MATRIX_CACHE[time] = matrix
+    except TypeError:
+        pass
+    return matrix
+
+
+# Cache of the obliquity rotation matrices, which are discarded along with the equinox (the J2000.0
+# equinox is a module-level constant in frames.py, so its matrix is calculated only once)
+_OBLIQUITY_MATRIX_CACHE = weakref.WeakKeyDictionary()
 
 
 @frame_transform_graph.transform(FunctionTransformWithFiniteDifference,
@@ -972,7 +1152,8 @@ def gei_to_gei(from_coo, to_frame):
     """
     Convert between two Geocentric Earth Equatorial frames.
     """
-    if np.all((from_coo.equinox == to_frame.equinox) and (from_coo.obstime == to_frame.obstime)):
+    if _times_are_equal(from_coo.equinox, to_frame.equinox) and \
+       _times_are_equal(from_coo.obstime, to_frame.obstime):
         return to_frame.realize_frame(from_coo.data)
     else:
         return from_coo.transform_to(HCRS(obstime=from_coo.obstime)).transform_to(to_frame)
@@ -982,6 +1163,16 @@ def _make_sunpy_graph():
     """
     Culls down the full transformation graph for SunPy purposes and returns the string version
     """
+    # The string version depends only on the transforms in the full graph, so it is cached with the
+    # set of edges as the key
+    edges = frozenset((source, destination, transform)
+                      for source, destinations in frame_transform_graph._graph.items()
+                      for destination, transform in destinations.items())
+    return _make_sunpy_graph_cached(edges)
+
+
+@lru_cache(maxsize=1)
+def _make_sunpy_graph_cached(edges):
     # Frames to keep in the transformation graph
     keep_list = ['icrs', 'hcrs', 'heliocentrictrueecliptic', 'heliocentricmeanecliptic',
                  'heliographic_stonyhurst', 'heliographic_carrington',
@@ -991,23 +1182,15 @@ def _make_sunpy_graph():
                  'gcrs', 'precessedgeocentric', 'geocentrictrueecliptic', 'geocentricmeanecliptic',
                  'cirs', 'altaz', 'itrs']
 
-    small_graph = deepcopy(frame_transform_graph)
-    cull_list = [name for name in small_graph.get_names() if name not in keep_list]
-    cull_frames = [small_graph.lookup_name(name) for name in cull_list]
-
-    for frame in cull_frames:
-        # Remove the part of the graph where the unwanted frame is the source frame
-        if frame in small_graph._graph:
-            del small_graph._graph[frame]
-
-        # Remove all instances of the unwanted frame as the destination frame
-        for entry in small_graph._graph:
-            if frame in small_graph._graph[entry]:
-                del (small_graph._graph[entry])[frame]
-
-    # Clean up the node list
-    for name in cull_list:
-        small_graph._cached_names.pop(name)
+    # Build the culled graph from shallow copies of the edges rather than a deep copy of the full
+    # graph, since only the graph structure is modified and not the transform objects themselves
+    keep_frames = {frame_transform_graph.lookup_name(name) for name in keep_list}
+    small_graph = TransformGraph()
+    for source, destinations in frame_transform_graph._graph.items():
+        if source in keep_frames:
+            small_graph._graph[source] = {destination: transform
+                                          for destination, transform in destinations.items()
+                                          if destination in keep_frames}
 
     _add_astropy_node(small_graph)
 
@@ -1035,57 +1218,73 @@ def _add_astropy_node(graph):
         pass
 
 
+@lru_cache(maxsize=4)
 def _tweak_graph(docstr):
     # Remove Astropy's diagram description
-    output = docstr[docstr.find('.. Wrap the graph'):]
+    # (If the description is not found, the full docstring is kept)
+    _, marker, output = docstr.partition('.. Wrap the graph')
+    output = marker + output if marker else docstr
 
-    # Change the Astropy node
-    output = output.replace('Astropy [shape=oval label="Astropy\\n`REPLACE`"]',
-                            'Astropy [shape=box3d style=filled fillcolor=lightcyan '
-                            'label="Other frames\\nin Astropy"]')
-
-    # Change the Astropy<->ICRS links to black
-    output = output.replace('ICRS -> Astropy[  color = "#783001" ]',
-                            'ICRS -> Astropy[  color = "#000000" ]')
-    output = output.replace('Astropy -> ICRS[  color = "#783001" ]',
-                            'Astropy -> ICRS[  color = "#000000" ]')
-
-    # Set the nodes to be filled and cyan by default
-    output = output.replace('AstropyCoordinateTransformGraph {',
-                            'AstropyCoordinateTransformGraph {\n'
-                            '        node [style=filled fillcolor=lightcyan]')
-
-    # Set the nodes for SunPy frames to be white
-    sunpy_frames = ['HeliographicStonyhurst', 'HeliographicCarrington',
-                    'Heliocentric', 'Helioprojective',
-                    'HeliocentricEarthEcliptic', 'GeocentricSolarEcliptic',
-                    'HeliocentricInertial', 'GeocentricEarthEquatorial']
-    for frame in sunpy_frames:
-        output = output.replace(frame + ' [', frame + ' [fillcolor=white ')
-
-    # Set the rank direction to be left->right (as opposed to top->bottom)
-    # Force nodes for ICRS, HCRS, and "Other frames in Astropy" to be at the same rank
-    output = output.replace('        overlap=false',
-                            '        overlap=false\n'
-                            '        rankdir=LR\n'
-                            '        {rank=same; ICRS; HCRS; Astropy}')
-
-    output = output.replace('<ul>\n\n',
-                            '<ul>\n\n' +
-                            _add_legend_row('SunPy frames', 'white') +
-                            _add_legend_row('Astropy frames', 'lightcyan'))
+    # Make all of the adjustments
+    # (Every adjustment is a literal string, for which str.replace() is faster than even a single
+    # regex pass, so a regex should be used only for an adjustment that is not a literal string)
+    for original, (replacement, count) in _GRAPH_TWEAKS.items():
+        output = output.replace(original, replacement, count)
 
     return output
 
 
 def _add_legend_row(label, color):
-    row = '        <li style="list-style: none;">\n'\
-          '            <p style="font-size: 12px;line-height: 24px;font-weight: normal;'\
-          'color: #848484;padding: 0;margin: 0;">\n'\
-          '                <b>' + label + ':</b>\n'\
-          '                    <span class="dot" style="height: 20px;width: 40px;'\
-          'background-color: ' + color + ';border-radius: 50%;border: 1px solid black;'\
-          'display: inline-block;"></span>\n'\
-          '            </p>\n'\
-          '        </li>\n\n\n'
+    row = ('        <li style="list-style: none;">\n'
+           '            <p style="font-size: 12px;line-height: 24px;font-weight: normal;'
+           'color: #848484;padding: 0;margin: 0;">\n'
+           f'                <b>{label}:</b>\n'
+           '                    <span class="dot" style="height: 20px;width: 40px;'
+           f'background-color: {color};border-radius: 50%;border: 1px solid black;'
+           'display: inline-block;"></span>\n'
+           '            </p>\n'
+           '        </li>\n\n\n')
     return row
+
+
+# The legend entries for the graph
+_SUNPY_LEGEND_ROW = _add_legend_row('SunPy frames', 'white')
+_ASTROPY_LEGEND_ROW = _add_legend_row('Astropy frames', 'lightcyan')
+_LEGEND_ROWS = _SUNPY_LEGEND_ROW + _ASTROPY_LEGEND_ROW
+
+# The replacement for the Astropy node
+_ASTROPY_NODE_REPLACEMENT = ('Astropy [shape=box3d style=filled fillcolor=lightcyan '
+                             'label="Other frames\\nin Astropy"]')
+
+# Set the nodes to be filled and cyan by default
+_NODE_DEFAULTS = ('AstropyCoordinateTransformGraph {\n'
+                  '        node [style=filled fillcolor=lightcyan]')
+
+# Set the rank direction to be left->right (as opposed to top->bottom)
+# Force nodes for ICRS, HCRS, and "Other frames in Astropy" to be at the same rank
+_RANK_BLOCK = ('        overlap=false\n'
+               '        rankdir=LR\n'
+               '        {rank=same; ICRS; HCRS; Astropy}')
+
+# Adjustments to make to the graph, where each original string is replaced by its new string
+# The count is the maximum number of replacements, where -1 replaces every occurrence, and is 1 for
+# a string that occurs only once so that str.replace() stops scanning after the first match
+_GRAPH_TWEAKS = {
+    'Astropy [shape=oval label="Astropy\\n`REPLACE`"]': (_ASTROPY_NODE_REPLACEMENT, 1),
+
+    # Change the Astropy<->ICRS links to black
+    'ICRS -> Astropy[  color = "#783001" ]': ('ICRS -> Astropy[  color = "#000000" ]', 1),
+    'Astropy -> ICRS[  color = "#783001" ]': ('Astropy -> ICRS[  color = "#000000" ]', 1),
+
+    'AstropyCoordinateTransformGraph {': (_NODE_DEFAULTS, 1),
+    '        overlap=false': (_RANK_BLOCK, 1),
+    '<ul>\n\n': ('<ul>\n\n' + _LEGEND_ROWS, 1),
+}
+
+# Set the nodes for SunPy frames to be white
+for _frame in ['HeliographicStonyhurst', 'HeliographicCarrington',
+               'Heliocentric', 'Helioprojective',
+               'HeliocentricEarthEcliptic', 'GeocentricSolarEcliptic',
+               'HeliocentricInertial', 'GeocentricEarthEquatorial']:
+    _GRAPH_TWEAKS[_frame + ' ['] = (_frame + ' [fillcolor=white ', -1)
+del _frame
@@ -2,6 +2,7 @@
 This module provides processing routines for data captured with the LYRA (Lyman
 Alpha Radiometer) instrument on Proba-2.
 """
+import re
 import csv
 import copy
 import sqlite3
@@ -14,6 +15,7 @@ import pandas
 
 from astropy.time import Time
 
+from sunpy import log
 from sunpy.data import cache
 from sunpy.time import parse_time
 from sunpy.time.time import _variables_for_parse_time_docstring
@@ -21,6 +23,9 @@ from sunpy.util.decorators import add_common_docstring
 
 LYTAF_REMOTE_PATH = "http://proba2.oma.be/lyra/data/lytaf/"
 
+# ISO 8601 time strings, which astropy parses far faster than strptime does
+_ISO_TIME_RE = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d*)?)?$")
+
 
 __all__ = ['remove_lytaf_events_from_timeseries',
            'get_lytaf_events',
@@ -228,8 +233,10 @@ def _remove_lytaf_events(time, channels=None, artifacts=None,
             print(all_lytaf_event_types)
             raise ValueError(f"{artifact} is not a valid artifact type. See above.")
     # Define outputs
-    clean_time = parse_time(time)
-    clean_channels = copy.deepcopy(channels)
+    clean_time = _parse_time_array(time)
+    # The channel arrays are replaced rather than modified in place below,
+    # so a shallow copy of the list is enough.
+    clean_channels = list(channels) if channels else channels
     artifacts_not_found = []
     # Get LYTAF file for given time range
     lytaf = get_lytaf_events(time[0], time[-1],
@@ -257,16 +264,14 @@ def _remove_lytaf_events(time, channels=None, artifacts=None,
     else:
         # Remove periods corresponding to artifacts from flux and time
         # arrays.
-        bad_indices = np.empty(0, dtype="int64")
-        all_indices = np.arange(len(time))
-        for index in artifact_indices:
-            bad_period = np.logical_and(time >= lytaf["begin_time"][index].datetime,
-                                        time <= lytaf["end_time"][index].datetime)
-            bad_indices = np.append(bad_indices, all_indices[bad_period])
-        clean_time = np.delete(clean_time, bad_indices)
+        keep = ~_interval_mask(clean_time,
+                               Time(list(lytaf["begin_time"][artifact_indices])),
+                               Time(list(lytaf["end_time"][artifact_indices])),
+                               include_end=True)
+        clean_time = clean_time[keep]
         if channels:
             for i, f in enumerate(clean_channels):
-                clean_channels[i] = np.delete(f, bad_indices)
+                clean_channels[i] = np.asanyarray(f)[keep]
     # If return_artifacts kwarg is True, return a list containing
     # information on what artifacts found, removed, etc.  See docstring.
     if return_artifacts:
@@ -366,14 +371,15 @@ def get_lytaf_events(start_time, end_time,
     start_time_uts = (start_time - Time('1970-1-1')).sec
     end_time_uts = (end_time - Time('1970-1-1')).sec
 
-    # Define numpy record array which will hold the information from
-    # the annotation file.
-    lytaf = np.empty((0,), dtype=[("insertion_time", object),
-                                  ("begin_time", object),
-                                  ("reference_time", object),
-                                  ("end_time", object),
-                                  ("event_type", object),
-                                  ("event_definition", object)])
+    # Define the dtype of the numpy record array which will hold the
+    # information from the annotation file.
+    lytaf_dtype = [("insertion_time", object),
+                   ("begin_time", object),
+                   ("reference_time", object),
+                   ("end_time", object),
+                   ("event_type", object),
+                   ("event_definition", object)]
+    lytaf_rows = []
     # Access annotation files
     for suffix in combine_files:
         # Check database files are present
@@ -387,13 +393,9 @@ def get_lytaf_events(start_time, end_time,
         # user.  If not, download newest version.
         # First get start time of first event and end time of last
         # event in lytaf.
-        cursor.execute("select begin_time from event order by begin_time asc "
-                       "limit 1;")
-        db_first_begin_time = cursor.fetchone()[0]
+        cursor.execute("select min(begin_time), max(end_time) from event;")
+        db_first_begin_time, db_last_end_time = cursor.fetchone()
         db_first_begin_time = datetime.datetime.fromtimestamp(db_first_begin_time)
-        cursor.execute("select end_time from event order by end_time desc "
-                       "limit 1;")
-        db_last_end_time = cursor.fetchone()[0]
         db_last_end_time = datetime.datetime.fromtimestamp(db_last_end_time)
         # If lytaf does not include entire input time range...
         if not force_use_local_lytaf:
@@ -408,40 +410,33 @@ def get_lytaf_events(start_time, end_time,
                 connection = sqlite3.connect(str(lytaf_path))
                 cursor = connection.cursor()
         # Select and extract the data from event table within file within
-        # given time range
-        cursor.execute("select insertion_time, begin_time, reference_time, "
-                       "end_time, eventType_id from event where end_time >= "
-                       "{} and begin_time <= "
-                       "{}".format(start_time_uts, end_time_uts))
-        event_rows = cursor.fetchall()
-        # Select and extract the event types from eventType table
-        cursor.row_factory = sqlite3.Row
-        cursor.execute("select * from eventType")
-        eventType_rows = cursor.fetchall()
-        eventType_id = []
-        eventType_type = []
-        eventType_definition = []
-        for eventType_row in eventType_rows:
-            eventType_id.append(eventType_row["id"])
-            eventType_type.append(eventType_row["type"])
-            eventType_definition.append(eventType_row["definition"])
-        # Enter desired information into the lytaf numpy record array
-        for event_row in event_rows:
-            id_index = eventType_id.index(event_row[4])
-            lytaf = np.append(lytaf,
-                              np.array((Time(datetime.datetime.utcfromtimestamp(event_row[0]),
-                                             format='datetime'),
-                                        Time(datetime.datetime.utcfromtimestamp(event_row[1]),
-                                             format='datetime'),
-                                        Time(datetime.datetime.utcfromtimestamp(event_row[2]),
-                                             format='datetime'),
-                                        Time(datetime.datetime.utcfromtimestamp(event_row[3]),
-                                             format='datetime'),
-                                        eventType_type[id_index],
-                                        eventType_definition[id_index]), dtype=lytaf.dtype))
+        # given time range, along with the type and definition of each event
+        # from the eventType table
+        cursor.execute("select event.insertion_time, event.begin_time, "
+                       "event.reference_time, event.end_time, eventType.type, "
+                       "eventType.definition from event join eventType on "
+                       "event.eventType_id = eventType.id where "
+                       "event.end_time >= ? and event.begin_time <= ?",
+                       (start_time_uts, end_time_uts))
+        # The information for each event is entered into the lytaf numpy record
+        # array once all files have been read
+        lytaf_rows.extend(cursor.fetchall())
         # Close file
         cursor.close()
         connection.close()
+    # Convert the UNIX timestamps of all events in a single call rather than
+    # one datetime at a time.  They go through datetime64 so that the times are
+    # exact, as they were when built from datetime.utcfromtimestamp.
+    timestamps = np.array([event_row[:4] for event_row in lytaf_rows],
+                          dtype="float64").reshape(-1, 4)
+    event_times = Time(np.round(timestamps * 1e6).astype("int64").astype("datetime64[us]"))
+    event_times.format = "datetime"
+    # Enter the information from all files into the lytaf numpy record array
+    lytaf = np.empty((len(lytaf_rows),), dtype=lytaf_dtype)
+    for i, name in enumerate(lytaf.dtype.names[:4]):
+        lytaf[name] = list(event_times[:, i])
+    lytaf["event_type"] = [event_row[4] for event_row in lytaf_rows]
+    lytaf["event_definition"] = [event_row[5] for event_row in lytaf_rows]
     # Sort lytaf in ascending order of begin time
     np.recarray.sort(lytaf, order="begin_time")
 
@@ -452,16 +447,12 @@ def get_lytaf_events(start_time, end_time,
             csvwriter = csv.writer(openfile, delimiter=';')
             # Write header.
             csvwriter.writerow(lytaf.dtype.names)
-            # Write data.
-            for row in lytaf:
-                new_row = []
-                new_row.append(row[0].strftime("%Y-%m-%dT%H:%M:%S"))
-                new_row.append(row[1].strftime("%Y-%m-%dT%H:%M:%S"))
-                new_row.append(row[2].strftime("%Y-%m-%dT%H:%M:%S"))
-                new_row.append(row[3].strftime("%Y-%m-%dT%H:%M:%S"))
-                new_row.append(row[4])
-                new_row.append(row[5])
-                csvwriter.writerow(new_row)
+            # Write data, formatting each time column in a single call.
+            if len(lytaf):
+                time_columns = [Time(list(lytaf[name])).strftime("%Y-%m-%dT%H:%M:%S")
+                                for name in lytaf.dtype.names[:4]]
+                csvwriter.writerows(zip(*time_columns, lytaf["event_type"],
+                                        lytaf["event_definition"]))
 
     return lytaf
 
@@ -530,33 +521,26 @@ def split_series_using_lytaf(timearray, data, lytaf):
         "good data".
     """
     n = len(timearray)
-    mask = np.ones(n)
+    mask = np.ones(n, dtype=np.int8)
     el = len(lytaf)
 
-    # make the input time array a list of Time objects
-    time_array = [parse_time(tim) for tim in timearray]
-
-    # scan through each entry retrieved from the LYTAF database
-    for j in range(0, el):
-        # want to mark all times with events as bad in the mask, i.e. = 0
-        start_dt = lytaf['begin_time'][j]
-        end_dt = lytaf['end_time'][j]
-
-        # find the start and end indices for each event
-        start_ind = np.searchsorted(time_array, start_dt)
-        end_ind = np.searchsorted(time_array, end_dt)
+    # parse the input time array in one call and make it a list of Time objects
+    times = _parse_time_array(timearray)
+    time_array = list(times)
 
-        # append the mask to mark event as 'bad'
-        mask[start_ind:end_ind] = 0
+    if el:
+        # want to mark all times within the events retrieved from the LYTAF
+        # database as bad in the mask, i.e. = 0
+        mask[_interval_mask(times, parse_time(list(lytaf["begin_time"])),
+                            parse_time(list(lytaf["end_time"])))] = 0
 
     diffmask = np.diff(mask)
-    tmp_discontinuity = np.where(diffmask != 0.)
     # disc contains the indices of mask where there are discontinuities
-    disc = tmp_discontinuity[0]
+    disc = np.flatnonzero(diffmask)
 
     if len(disc) == 0:
-        print('No events found within time series interval. '
-              'Returning original series.')
+        log.info('No events found within time series interval. '
+                 'Returning original series.')
         return [{'subtimes': time_array, 'subdata': data}]
 
     # -1 in diffmask means went from good data to bad
@@ -565,61 +549,94 @@ def split_series_using_lytaf(timearray, data, lytaf):
     # want to get the data between a +1 and the next -1
 
     # if the first discontinuity is a -1 then the start of the series was good.
-    if diffmask[disc[0]] == -1.0:
+    if diffmask[disc[0]] == -1:
         # make sure we can always start from disc[0] below
         disc = np.insert(disc, 0, 0)
 
-    split_series = []
+    # now extract the good data regions and ignore the bad ones: they start at
+    # every other discontinuity and end at the one after it
+    starts = disc[0::2]
+    stops = disc[1::2]
+    if len(stops) < len(starts):
+        # the last region has no following discontinuity. Go to end of series
+        stops = np.append(stops, -1)
 
-    limit = len(disc)
-    # now extract the good data regions and ignore the bad ones
-    for h in range(0, limit, 2):
+    return [{'subtimes': time_array[start:stop], 'subdata': data[start:stop]}
+            for start, stop in zip(starts, stops)]
 
-        if h == limit-1:
-            # can't index h+1 here. Go to end of series
-            subtimes = time_array[disc[h]:-1]
-            subdata = data[disc[h]:-1]
-            subseries = {'subtimes': subtimes, 'subdata': subdata}
-            split_series.append(subseries)
-        else:
-            subtimes = time_array[disc[h]:disc[h+1]]
-            subdata = data[disc[h]:disc[h+1]]
-            subseries = {'subtimes': subtimes, 'subdata': subdata}
-            split_series.append(subseries)
 
-    return split_series
+def _parse_time_array(timearray):
+    """
+    Parses an array of times with `sunpy.time.parse_time`, except that a list
+    of ISO 8601 strings or a datetime64 array is given straight to
+    `astropy.time.Time` as ISO 8601 strings.
+
+    `sunpy.time.parse_time` parses a list of strings one at a time with
+    strptime, and formats datetime64 values one at a time, while
+    `astropy.time.Time` parses ISO 8601 strings in bulk.
+    """
+    if isinstance(timearray, np.ndarray) and timearray.dtype.kind == "M":
+        return Time(np.datetime_as_string(timearray.astype("M8[ns]")))
+    if (isinstance(timearray, list) and timearray and isinstance(timearray[0], str)
+            and _ISO_TIME_RE.match(timearray[0])):
+        try:
+            return Time(np.asarray(timearray))
+        except ValueError:
+            pass
+    return parse_time(timearray)
+
+
+def _interval_mask(times, begin_times, end_times, include_end=False):
+    """
+    Returns a boolean mask of which of the times fall within any of the
+    intervals from begin_times to end_times.
+
+    All of the times are `astropy.time.Time` and are compared in UTC, which is
+    the time scale of the LYTAF events.  An interval includes its begin time,
+    and includes its end time only if include_end is True.
+    """
+    times = times.utc.datetime64
+    begin_times = begin_times.utc.datetime64
+    end_times = end_times.utc.datetime64
+    if include_end:
+        # Searching on the left for one tick after an end time is the same as
+        # searching on the right for the end time itself
+        end_times = end_times + np.timedelta64(1, np.datetime_data(end_times.dtype)[0])
+
+    # Find the indices of all of the begin and end times in the sorted times
+    # with a single search, which is much kinder to the branch predictor and
+    # the cache when the begin and end times are searched for in order too
+    order = np.argsort(times, kind="stable")
+    interval_times = np.concatenate((begin_times, end_times))
+    interval_order = np.argsort(interval_times, kind="stable")
+    interval_inds = np.empty(len(interval_times), dtype=np.intp)
+    interval_inds[interval_order] = np.searchsorted(times[order],
+                                                    interval_times[interval_order])
+    starts = interval_inds[:len(begin_times)]
+    stops = np.maximum(interval_inds[len(begin_times):], starts)
+
+    # Count +1 at the start and -1 after the end of each interval, so that the
+    # running total is positive for the sorted times within any interval
+    interval_counts = np.zeros(len(times) + 1, dtype="int64")
+    np.add.at(interval_counts, starts, 1)
+    np.add.at(interval_counts, stops, -1)
+    mask = np.empty(len(times), dtype=bool)
+    mask[order] = np.cumsum(interval_counts[:-1]) > 0
+    return mask
+
+
+# Names of the LYTAF event types, indexed by their integer code.  There is no
+# event type with code 0.
+_LYTAF_EVENT_NAMES = (None, 'LAR', 'N/A', 'UV occult.', 'Vis. occult.', 'Offpoint', 'SAA',
+                      'Auroral zone', 'Moon in LYRA', 'Moon in SWAP', 'Venus in LYRA',
+                      'Venus in SWAP')
 
 
 def _lytaf_event2string(integers):
     if isinstance(integers, int):
         integers = [integers]
-    out = []
-
-    for i in integers:
-        if i == 1:
-            out.append('LAR')
-        if i == 2:
-            out.append('N/A')
-        if i == 3:
-            out.append('UV occult.')
-        if i == 4:
-            out.append('Vis. occult.')
-        if i == 5:
-            out.append('Offpoint')
-        if i == 6:
-            out.append('SAA')
-        if i == 7:
-            out.append('Auroral zone')
-        if i == 8:
-            out.append('Moon in LYRA')
-        if i == 9:
-            out.append('Moon in SWAP')
-        if i == 10:
-            out.append('Venus in LYRA')
-        if i == 11:
-            out.append('Venus in SWAP')
-
-    return out
+
+    return [_LYTAF_EVENT_NAMES[i] for i in integers if 0 < i < len(_LYTAF_EVENT_NAMES)]
 
 
 # TODO: Change this function to only need the amount of channels to be passed in.
@@ -76,6 +76,33 @@ def test_split_series_using_lytaf():
     assert split_no_lytaf[0]["subdata"].all() == dummy_data.all()
 
 
+@pytest.mark.parametrize("scale", ["utc", "tt"])
+def test_split_series_using_lytaf_offline(scale):
+    """
+    Test split_series_using_lytaf() with synthetic LYTAF events, including a
+    time series in a time scale other than that of the events (UTC).
+    """
+    basetime = parse_time("2013-02-01")
+    dummy_time = [getattr(basetime + TimeDelta(10*s*u.second), scale) for s in range(720)]
+    dummy_data = np.arange(720)
+    split = lyra.split_series_using_lytaf(dummy_time, dummy_data, LYTAF_TEST)
+    assert len(split) == 3
+    # The good data either side of the LAR (00:07-00:10) and the UV occultation
+    # (01:22:44-01:45:36)
+    for subseries, (first, last) in zip(split, [(0, 40), (59, 495), (633, 718)]):
+        assert not set(subseries.keys()).symmetric_difference({"subtimes", "subdata"})
+        np.testing.assert_array_equal(subseries["subdata"], dummy_data[first:last + 1])
+        assert subseries["subtimes"] == dummy_time[first:last + 1]
+    assert is_time_equal(split[1]["subtimes"][0], parse_time("2013-02-01 00:09:50"))
+    assert is_time_equal(split[2]["subtimes"][0], parse_time("2013-02-01 01:45:30"))
+
+    # Test case when no LYTAF events found in time series.
+    split_no_lytaf = lyra.split_series_using_lytaf(dummy_time, dummy_data, EMPTY_LYTAF)
+    assert len(split_no_lytaf) == 1
+    assert split_no_lytaf[0]["subtimes"] == dummy_time
+    np.testing.assert_array_equal(split_no_lytaf[0]["subdata"], dummy_data)
+
+
 @pytest.fixture
 def lyra_ts():
     # Create sample TimeSeries
@@ -367,6 +394,32 @@ def test_lytaf_event2string():
     assert out_test_single == ['LAR']
 
 
+def test_parse_time_array():
+    """
+    Test _parse_time_array() gives the same times as parse_time().
+    """
+    for time_input in [["2010-06-13T02:00:00.5", "2010-06-13T02:00:01.25"],
+                       ["2010-06-13 02:00", "2010-06-13 03:00"],
+                       ["2010/06/13 02:00:00", "2010/06/13 03:00:00"],
+                       np.arange("2010-06-13T02:00", "2010-06-13T03:00",
+                                 dtype="datetime64[m]")]:
+        assert np.all(lyra._parse_time_array(time_input) == parse_time(time_input))
+
+
+def test_interval_mask():
+    """
+    Test _interval_mask() finds the times within the intervals, in UTC.
+    """
+    times = parse_time("2013-02-01") + np.array([3, 0, 1, 2, 4, 5]) * u.minute
+    begin_times = parse_time(["2013-02-01 00:01", "2013-02-01 00:05"])
+    end_times = parse_time(["2013-02-01 00:03", "2013-02-01 00:06"])
+    np.testing.assert_array_equal(lyra._interval_mask(times, begin_times, end_times),
+                                  [False, False, True, True, False, True])
+    np.testing.assert_array_equal(lyra._interval_mask(times.tt, begin_times, end_times,
+                                                      include_end=True),
+                                  [True, False, True, True, False, True])
+
+
 def test_prep_columns():
     """
     Test whether _prep_columns correctly prepares data.